@@ -0,0 +1,74 @@
+"""
+Shared Preprocessing for Training and Inference
+Single source of truth for turning raw health data into model features,
+imported by both the SageMaker training path and the Lambda inference path
+so the two cannot drift apart. For Lambda deployment, bundle this package
+into the function zip alongside lambda_function.py.
+"""
+
+import pandas as pd
+
+
+def preprocess_frame(df, expected_features=None):
+    """
+    Preprocess a full DataFrame of raw health data into model features.
+
+    Steps:
+    1. Split Blood Pressure into systolic and diastolic
+    2. Drop non-feature columns (Patient ID, Country, etc.)
+    3. Explicitly encode the known categorical variables (Sex, Diet)
+    4. Convert to numeric, fill missing values, narrow to float32/int8
+    5. Optionally align columns with the expected features from training
+
+    All steps use vectorized pandas operations so the cost is amortized
+    over the whole batch instead of being paid once per row.
+
+    Args:
+        df (pd.DataFrame): Raw patient data
+        expected_features (pd.Index or list, optional): Feature names from
+            training; when given, the output is reindexed to match exactly
+
+    Returns:
+        pd.DataFrame: Preprocessed dataframe ready for training or scoring
+    """
+    df = df.copy()
+
+    # Split Blood Pressure; one extract pass replaces the per-element list
+    # allocation of str.split(expand=True). The astype(str) is required:
+    # after the left join most rows have no vitals, and an all-NaN column
+    # parses as float64, where the .str accessor raises.
+    if "Blood Pressure" in df.columns:
+        bp = df["Blood Pressure"].astype(str).str.extract(r"(?P<sys>\d+)\s*/\s*(?P<dia>\d+)")
+        df["BP_Systolic"] = pd.to_numeric(bp["sys"], errors="coerce")
+        df["BP_Diastolic"] = pd.to_numeric(bp["dia"], errors="coerce")
+        df.drop(columns=["Blood Pressure"], inplace=True)
+
+    # Explicit encoding for the known categorical columns
+    sex = df["Sex"].astype(str).str.lower() if "Sex" in df.columns else None
+    diet = df["Diet"].astype(str).str.lower() if "Diet" in df.columns else None
+
+    # Drop non-feature columns and the categorical originals
+    df = df.drop(
+        columns=["Patient ID", "Country", "Continent", "Hemisphere", "Sex", "Diet"],
+        errors="ignore"
+    )
+
+    # Convert numeric & fill missing
+    df = df.apply(pd.to_numeric, errors="coerce").fillna(0)
+
+    # Narrow to float32 — XGBoost computes in float32 internally, so
+    # float64 just doubles memory and payload bytes
+    float_cols = df.select_dtypes("float64").columns
+    df[float_cols] = df[float_cols].astype("float32")
+
+    if sex is not None:
+        df["Sex_Male"] = (sex == "male").astype("int8")
+    if diet is not None:
+        df["Diet_Healthy"] = (diet == "healthy").astype("int8")
+        df["Diet_Unhealthy"] = (diet == "unhealthy").astype("int8")
+
+    # Align with expected features in one reindex
+    if expected_features is not None:
+        df = df.reindex(columns=expected_features, fill_value=0)
+
+    return df
@@ -0,0 +1,90 @@
+"""
+One-Time Raw CSV to Parquet Conversion
+Converts the raw historical CSV file to snappy-compressed Parquet so the
+main EMR job reads columnar data instead of re-parsing text. The simulated
+vitals are already written as Parquet by the phase 1 generator.
+Run once (and again whenever the raw CSV is replaced).
+"""
+from pyspark.sql import SparkSession
+
+from pyspark.sql.types import (
+    IntegerType, StructType, StructField, StringType, DoubleType, LongType
+)
+
+# CONFIG
+
+HIST_CSV_PATH = "s3://healthcare-project-data-jayesh-devre/raw/historical/heart_attack_prediction_dataset.csv"
+
+HIST_OUT_PATH = "s3://healthcare-project-data-jayesh-devre/raw/historical/heart_attack_prediction_dataset_parquet/"
+
+# Explicit schema — inferSchema would do a whole extra pass over the CSV
+
+HIST_SCHEMA = StructType([
+
+    StructField("Patient ID", StringType()),
+
+    StructField("Age", IntegerType()),
+
+    StructField("Sex", StringType()),
+
+    StructField("Cholesterol", DoubleType()),
+
+    StructField("Blood Pressure", StringType()),
+
+    StructField("Heart Rate", IntegerType()),
+
+    StructField("Diabetes", IntegerType()),
+
+    StructField("Family History", IntegerType()),
+
+    StructField("Smoking", IntegerType()),
+
+    StructField("Obesity", IntegerType()),
+
+    StructField("Alcohol Consumption", DoubleType()),
+
+    StructField("Exercise Hours Per Week", DoubleType()),
+
+    StructField("Diet", StringType()),
+
+    StructField("Previous Heart Problems", IntegerType()),
+
+    StructField("Medication Use", IntegerType()),
+
+    StructField("Stress Level", IntegerType()),
+
+    StructField("Sedentary Hours Per Day", DoubleType()),
+
+    StructField("Income", LongType()),
+
+    StructField("BMI", DoubleType()),
+
+    StructField("Triglycerides", IntegerType()),
+
+    StructField("Physical Activity Days Per Week", IntegerType()),
+
+    StructField("Sleep Hours Per Day", DoubleType()),
+
+    StructField("Country", StringType()),
+
+    StructField("Continent", StringType()),
+
+    StructField("Hemisphere", StringType()),
+
+    StructField("Heart Attack Risk", IntegerType())
+
+])
+
+# Start Spark session
+
+spark = SparkSession.builder.appName("ConvertRawToParquet").getOrCreate()
+
+# Convert historical dataset
+
+hist = spark.read.option("header", True).schema(HIST_SCHEMA).csv(HIST_CSV_PATH)
+
+hist.write.mode("overwrite").option("compression", "snappy").parquet(HIST_OUT_PATH)
+
+print("Historical dataset converted to:", HIST_OUT_PATH)
+
+spark.stop()
@@ -4,15 +4,15 @@ Main entry point for EMR (Elastic MapReduce) job processing.
 """
 from pyspark.sql import SparkSession
 
-from pyspark.sql.functions import avg, sum as _sum, round as _round, col, concat_ws
+from pyspark.sql.functions import avg, sum as _sum, round as _round, col, concat_ws, broadcast
 
-from pyspark.sql.types import IntegerType
+from pyspark.sql.types import IntegerType, DoubleType, FloatType
 
 # CONFIG
 
-HIST_PATH = "s3://healthcare-project-data-jayesh-devre/raw/historical/heart_attack_prediction_dataset.csv"
+HIST_PATH = "s3://healthcare-project-data-jayesh-devre/raw/historical/heart_attack_prediction_dataset_parquet/"
 
-SIM_PATH  = "s3://healthcare-project-data-jayesh-devre/raw/simulated/simulated_vitals.csv"
+SIM_PATH  = "s3://healthcare-project-data-jayesh-devre/raw/simulated/simulated_vitals.parquet"
 
 OUT_PATH  = "s3://healthcare-project-data-jayesh-devre/processed/final_health_dataset_csv/"
 
@@ -20,11 +20,16 @@ OUT_PATH  = "s3://healthcare-project-data-jayesh-devre/processed/final_health_da
 
 spark = SparkSession.builder.appName("AggregateVitalsJoinFinal").getOrCreate()
 
-# Load datasets
+# Auto-broadcast any table under 10 MB so small joins stay shuffle-free
 
-hist = spark.read.option("header", True).csv(HIST_PATH, inferSchema=True)
+spark.conf.set("spark.sql.autoBroadcastJoinThreshold", 10 * 1024 * 1024)
 
-sim  = spark.read.option("header", True).csv(SIM_PATH, inferSchema=True)
+# Load datasets (Parquet: columnar, compressed, schema embedded; see
+# convert_raw_to_parquet.py for the one-time CSV conversion)
+
+hist = spark.read.parquet(HIST_PATH)
+
+sim  = spark.read.parquet(SIM_PATH)
 
 # Aggregate simulated vitals (7 days → weekly averages)
 
@@ -69,12 +74,90 @@ hist_clean = hist.drop(
 )
 
 # Join historical demographics with aggregated vitals
+# The aggregate has one row per patient, so broadcast it for a map-side
+# join instead of shuffling the full historical table
+
+final = hist_clean.join(broadcast(agg), on="Patient ID", how="left")
+
+# Keep only patients that have simulated vitals, as the original agg-side
+# left join did. Patients without vitals would write empty CSV fields,
+# which the Athena table's OpenCSVSerde cannot cast to double/int
+
+final = final.filter(col("Heart Rate").isNotNull())
+
+# Restore the original column order: the Athena table (athena/ddl.sql) uses
+# OpenCSVSerde, which maps CSV columns by position, so the vitals columns
+# must stay right after Patient ID as they were before the join was flipped
+
+final = final.select(
+
+    "Patient ID",
+
+    "Heart Rate",
+
+    "Sleep Hours Per Day",
+
+    "Physical Activity Days Per Week",
+
+    "Blood Pressure",
+
+    "Age",
+
+    "Sex",
+
+    "Cholesterol",
+
+    "Diabetes",
+
+    "Family History",
+
+    "Smoking",
+
+    "Obesity",
+
+    "Alcohol Consumption",
+
+    "Exercise Hours Per Week",
+
+    "Diet",
+
+    "Previous Heart Problems",
+
+    "Medication Use",
+
+    "Stress Level",
+
+    "Sedentary Hours Per Day",
+
+    "Income",
+
+    "BMI",
+
+    "Triglycerides",
+
+    "Country",
+
+    "Continent",
+
+    "Hemisphere"
+
+)
+
+# Narrow double columns to float — XGBoost works in float32, and narrower
+# numerics mean less memory and shorter CSV text
+
+for field in final.schema.fields:
+
+    if isinstance(field.dataType, DoubleType):
 
-final =agg.join(hist_clean, on="Patient ID", how="left")
+        final = final.withColumn(field.name, col(field.name).cast(FloatType()))
 
 # Write final dataset to CSV (ready for SageMaker)
+# Write in parallel instead of coalesce(1); forcing one partition serializes
+# the final stage and the S3 upload onto a single executor. Downstream the
+# Lambda lists the prefix and handles multi-part output.
 
-final.coalesce(1).write.mode("overwrite").option("header", True).csv(OUT_PATH)
+final.repartition(8).write.mode("overwrite").option("header", True).csv(OUT_PATH)
 
 print("Final dataset written successfully to:", OUT_PATH)
 
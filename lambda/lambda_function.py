@@ -5,12 +5,19 @@ and sends alerts for high-risk patients via SNS.
 """
 
 import boto3
-import csv
 import io
+import numpy as np
 import pandas as pd
 import json
+from botocore.config import Config
+from botocore.exceptions import ClientError
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
+# Shared with the SageMaker training path; bundle common/ into the
+# deployment zip alongside this file
+from common.preprocess import preprocess_frame
+
 from config import (
     ENDPOINT_NAME,
     BUCKET_NAME,
@@ -21,21 +28,40 @@ from config import (
     MAX_ROWS_TO_PROCESS
 )
 
-# Initialize AWS clients
-runtime = boto3.client("sagemaker-runtime")
+# Initialize AWS clients at module scope so warm Lambda containers reuse
+# the pooled connections; keepalive avoids a TLS handshake per invoke
+runtime = boto3.client(
+    "sagemaker-runtime",
+    config=Config(
+        max_pool_connections=64,
+        retries={"mode": "standard", "max_attempts": 3},
+        tcp_keepalive=True
+    )
+)
 s3 = boto3.client("s3")
 sns = boto3.client("sns")
 
 
+# Cached feature list; feature_list.txt only changes when the model is
+# retrained, so warm Lambda containers skip the S3 round-trip
+_FEATURE_CACHE = None
+
+
 def load_feature_list():
     """
-    Load expected feature list from S3.
-    
+    Load expected feature list from S3, cached across warm invocations.
+
     This ensures the preprocessing aligns with the features used during training.
-    
+    The cache holds a prebuilt pd.Index so the reindex in preprocess_frame
+    reuses one hashed Index instead of rebuilding it from a list every call.
+
     Returns:
-        list: List of expected feature names in the correct order
+        pd.Index: Expected feature names in the correct order
     """
+    global _FEATURE_CACHE
+    if _FEATURE_CACHE is not None:
+        return _FEATURE_CACHE
+
     obj = s3.get_object(Bucket=BUCKET_NAME, Key=FEATURE_LIST_KEY)
     features = obj["Body"].read().decode("utf-8").splitlines()
     features = [f.strip() for f in features if f.strip()]
@@ -43,59 +69,121 @@ def load_feature_list():
     # Remove target variable if present
     if "Heart Attack Risk" in features:
         features.remove("Heart Attack Risk")
-    
-    return features
+
+    _FEATURE_CACHE = pd.Index(features)
+    return _FEATURE_CACHE
 
 
-def preprocess_row(df_row, expected_features):
+def read_processed_csv(csv_key):
     """
-    Preprocess one row and align with training feature set.
-    
-    Steps:
-    1. Split Blood Pressure into systolic and diastolic
-    2. Drop non-feature columns (Patient ID, Country, etc.)
-    3. Manual one-hot encoding for categorical variables (Sex, Diet)
-    4. Convert to numeric and fill missing values
-    5. Align columns with expected features from training
-    
+    Read the first MAX_ROWS_TO_PROCESS rows of a processed CSV from S3.
+
+    Uses S3 Select so only the needed rows leave S3 instead of downloading
+    the whole object. The LIMIT includes one extra row because the header
+    line is kept in the selection (FileHeaderInfo NONE), letting pd.read_csv
+    parse column names as usual.
+
     Args:
-        df_row (dict): Raw patient data row
-        expected_features (list): List of feature names from training
-        
+        csv_key (str): S3 key of the processed CSV file
+
     Returns:
-        pd.DataFrame: Preprocessed dataframe with features aligned to training set
+        pd.DataFrame: Parsed dataframe with at most MAX_ROWS_TO_PROCESS rows
     """
-    df = pd.DataFrame([df_row])
-    
-    # Split Blood Pressure
-    if "Blood Pressure" in df.columns:
-        bp = df["Blood Pressure"].astype(str).str.split("/", n=1, expand=True)
-        df["BP_Systolic"] = pd.to_numeric(bp[0], errors="coerce")
-        df["BP_Diastolic"] = pd.to_numeric(bp[1], errors="coerce")
-        df.drop(columns=["Blood Pressure"], inplace=True)
-    
-    # Drop non-feature columns
-    df = df.drop(columns=["Patient ID", "Country", "Continent", "Hemisphere"], errors="ignore")
-    
-    # Manual encoding for categorical columns
-    df["Sex_Male"] = (df["Sex"].astype(str).str.lower() == "male").astype(int)
-    df["Diet_Healthy"] = (df["Diet"].astype(str).str.lower() == "healthy").astype(int)
-    df["Diet_Unhealthy"] = (df["Diet"].astype(str).str.lower() == "unhealthy").astype(int)
-    
-    # Drop originals
-    df = df.drop(columns=["Sex", "Diet"], errors="ignore")
-    
-    # Convert numeric & fill missing
-    df = df.apply(pd.to_numeric, errors="coerce").fillna(0)
-    
-    # Align with expected features
-    for col in expected_features:
-        if col not in df.columns:
-            df[col] = 0
-    
-    df = df[expected_features]
-    
-    return df
+    try:
+        response = s3.select_object_content(
+            Bucket=BUCKET_NAME,
+            Key=csv_key,
+            ExpressionType="SQL",
+            Expression=f"SELECT * FROM S3Object s LIMIT {MAX_ROWS_TO_PROCESS + 1}",
+            InputSerialization={"CSV": {"FileHeaderInfo": "NONE"}},
+            OutputSerialization={"CSV": {}}
+        )
+        payload = b"".join(
+            event["Records"]["Payload"]
+            for event in response["Payload"]
+            if "Records" in event
+        )
+    except Exception as e:
+        # S3 Select unavailable (e.g. storage class); fall back to full GET
+        print(f"S3 Select failed ({e}); falling back to get_object.")
+        obj = s3.get_object(Bucket=BUCKET_NAME, Key=csv_key)
+        payload = obj["Body"].read()
+
+    return pd.read_csv(io.BytesIO(payload), nrows=MAX_ROWS_TO_PROCESS)
+
+
+# Whether the deployed container answers application/x-npy; cached like
+# _FEATURE_CACHE so warm containers don't re-probe (and re-score the
+# batch) on every invocation
+_NPY_SUPPORTED = None
+
+
+def invoke_endpoint_batch(df_batch):
+    """
+    Score a preprocessed batch against the SageMaker endpoint.
+
+    Sends all rows as one multi-row CSV payload; the XGBoost container
+    returns one score per line. If the endpoint rejects the batched
+    payload, falls back to per-row invokes spread over a thread pool so
+    the I/O-bound round-trips overlap instead of running serially.
+
+    Args:
+        df_batch (pd.DataFrame): Preprocessed feature rows
+
+    Returns:
+        list: One float risk score per input row
+    """
+    global _NPY_SUPPORTED
+
+    # Join the numeric values directly; after preprocessing every cell is
+    # numeric, so the to_csv escaping/dispatch machinery is pure overhead
+    row_payloads = [
+        ",".join(f"{v:g}" for v in row)
+        for row in df_batch.to_numpy()
+    ]
+    csv_payload = "\n".join(row_payloads) + "\n"
+
+    if _NPY_SUPPORTED is not False:
+        try:
+            # Prefer a packed binary response: one np.load replaces parsing
+            # N ASCII floats. Not every container version supports x-npy.
+            response = runtime.invoke_endpoint(
+                EndpointName=ENDPOINT_NAME,
+                ContentType="text/csv",
+                Accept="application/x-npy",
+                Body=csv_payload
+            )
+            scores = np.load(io.BytesIO(response["Body"].read()), allow_pickle=False)
+            _NPY_SUPPORTED = True
+            return np.asarray(scores, dtype="float64").ravel().tolist()
+        except (ClientError, ValueError) as e:
+            _NPY_SUPPORTED = False
+            print(f"x-npy response unavailable ({e}); using text/csv from now on.")
+
+    try:
+        # Accept text/csv so the container returns one newline-separated
+        # score per input row for the multi-record payload
+        response = runtime.invoke_endpoint(
+            EndpointName=ENDPOINT_NAME,
+            ContentType="text/csv",
+            Accept="text/csv",
+            Body=csv_payload
+        )
+        raw_result = response["Body"].read().decode("utf-8").strip()
+        return [float(line) for line in raw_result.splitlines() if line.strip()]
+    except ClientError as e:
+        print(f"Batched invoke failed ({e}); falling back to per-row invokes.")
+
+    def invoke_one(row_payload):
+        response = runtime.invoke_endpoint(
+            EndpointName=ENDPOINT_NAME,
+            ContentType="text/csv",
+            Body=row_payload
+        )
+        return float(response["Body"].read().decode("utf-8").strip())
+
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        return list(executor.map(invoke_one, row_payloads))
 
 
 def lambda_handler(event, context):
@@ -105,8 +193,8 @@ def lambda_handler(event, context):
     Workflow:
     1. Load expected feature list from S3
     2. Get latest processed CSV file from S3
-    3. Process each row (up to MAX_ROWS_TO_PROCESS)
-    4. Make predictions using SageMaker endpoint
+    3. Preprocess rows (up to MAX_ROWS_TO_PROCESS)
+    4. Make predictions with a single batched SageMaker endpoint call
     5. Save predictions to S3
     6. Send SNS alerts for high-risk patients
     
@@ -123,61 +211,61 @@ def lambda_handler(event, context):
     expected_features = load_feature_list()
     print(f"Loaded {len(expected_features)} expected features from training.")
     
-    # Get latest processed CSV
-    objects = s3.list_objects_v2(Bucket=BUCKET_NAME, Prefix=PROCESSED_PREFIX)
-    csv_files = [obj["Key"] for obj in objects.get("Contents", []) if obj["Key"].endswith(".csv")]
-    
+    # Get latest processed CSV (list_objects_v2 returns keys in lexicographic
+    # order, so pick the newest by LastModified across all pages)
+    paginator = s3.get_paginator("list_objects_v2")
+    pages = paginator.paginate(
+        Bucket=BUCKET_NAME,
+        Prefix=PROCESSED_PREFIX,
+        PaginationConfig={"PageSize": 1000}
+    )
+    csv_files = [
+        (obj["Key"], obj["LastModified"])
+        for page in pages
+        for obj in page.get("Contents", [])
+        if obj["Key"].endswith(".csv")
+    ]
+
     if not csv_files:
         return {
             "statusCode": 404,
             "body": json.dumps({"error": "No CSV file found."})
         }
-    
-    csv_key = csv_files[0]
+
+    csv_key = max(csv_files, key=lambda item: item[1])[0]
     print(f"Using file: {csv_key}")
     
-    # Read CSV
-    obj = s3.get_object(Bucket=BUCKET_NAME, Key=csv_key)
-    data = obj["Body"].read().decode("utf-8").splitlines()
-    reader = csv.DictReader(data)
-    rows = list(reader)
-    
-    print(f"Columns detected ({len(reader.fieldnames)}): {reader.fieldnames}")
-    
+    # Read only the rows we will score (limit to avoid timeout)
+    df = read_processed_csv(csv_key)
+
+    print(f"Columns detected ({len(df.columns)}): {list(df.columns)}")
+
     results, alerts, alert_details = [], 0, []
     predictions = []
-    
-    # Process rows (limit to avoid timeout)
-    for i, row in enumerate(rows[:MAX_ROWS_TO_PROCESS]):
-        patient_id = row.get("Patient ID", f"Row{i+1}")
-        
-        # Preprocess row to match training features
-        df_row = preprocess_row(row, expected_features)
-        
-        # Convert to CSV format for SageMaker
-        csv_payload = df_row.to_csv(index=False, header=False)
-        
-        # Invoke SageMaker endpoint
-        response = runtime.invoke_endpoint(
-            EndpointName=ENDPOINT_NAME,
-            ContentType="text/csv",
-            Body=csv_payload
-        )
-        
-        raw_result = response["Body"].read().decode("utf-8").strip()
-        
-        if raw_result:
-            score = float(raw_result)
+
+    if "Patient ID" in df.columns:
+        patient_ids = df["Patient ID"].tolist()
+    else:
+        patient_ids = [f"Row{i+1}" for i in range(len(df))]
+
+    if len(df) > 0:
+        df_batch = preprocess_frame(df, expected_features)
+
+        # One batched SageMaker call, with a threaded per-row fallback
+        scores = invoke_endpoint_batch(df_batch)
+
+        scored_at = datetime.utcnow().isoformat() + "Z"
+        for patient_id, score in zip(patient_ids, scores):
             results.append(score)
             print(f"Risk score for {patient_id}: {score:.3f}")
-            
+
             predictions.append({
                 "Patient ID": patient_id,
                 "Heart Attack Risk": round(score, 6),
                 "Risk_Status": "HIGH_RISK" if score > ALERT_THRESHOLD else "LOW_RISK",
-                "ScoredAt": datetime.utcnow().isoformat() + "Z"
+                "ScoredAt": scored_at
             })
-            
+
             # Check for high-risk alerts
             if score > ALERT_THRESHOLD:
                 alerts += 1
@@ -194,13 +282,12 @@ def lambda_handler(event, context):
     
     if predictions:
         df_pred = pd.DataFrame(predictions)
-        csv_buf = io.StringIO()
+        # Serialize straight into a binary buffer and stream it to S3;
+        # avoids the StringIO -> str -> bytes copies of put_object
+        csv_buf = io.BytesIO()
         df_pred.to_csv(csv_buf, index=False)
-        s3.put_object(
-            Bucket=BUCKET_NAME,
-            Key=pred_key,
-            Body=csv_buf.getvalue().encode("utf-8")
-        )
+        csv_buf.seek(0)
+        s3.upload_fileobj(csv_buf, BUCKET_NAME, pred_key)
         print(f"Predictions saved to s3://{BUCKET_NAME}/{pred_key}")
     
     # Send SNS notification for high-risk patients
@@ -216,12 +303,12 @@ def lambda_handler(event, context):
         except Exception as e:
             print(f"SNS notification failed: {e}")
     
-    print(f"Processed {len(rows)} rows, triggered {alerts} alerts.")
+    print(f"Processed {len(df)} rows, triggered {alerts} alerts.")
     
     return {
         "statusCode": 200,
         "body": json.dumps({
-            "processed_rows": len(rows),
+            "processed_rows": len(df),
             "alerts_triggered": alerts,
             "alert_details": alert_details,
             "all_scores": results
@@ -2,8 +2,8 @@
 Generate Simulated Vital Signs Data
 This script generates simulated patient vital signs data for testing and development.
 """
+import numpy as np
 import pandas as pd
-import random
 import time
 
 patient_ids = [
@@ -13,23 +13,25 @@ patient_ids = [
     "XBI0592","RQX1211"
 ]
 
-records = []
-for pid in patient_ids:
-    for i in range(7):
-        record = {
-            "Patient ID": pid,
-            "Heart Rate": random.randint(60, 110),
-            "BP_Systolic": random.randint(100, 170),
-            "BP_Diastolic": random.randint(60, 120),
-            "Sleep Hours Per Day": round(random.uniform(3, 9), 1),
-            "Physical Activity Per day": random.randint(0, 1),
-            "Timestamp": int(time.time()) + i
-        }
-        records.append(record)
+DAYS = 7
 
-df = pd.DataFrame(records)
-df.to_csv("simulated_vitals.csv", index=False)
-print("Generated simulated_vitals.csv")
+# Generate all vitals as whole columns instead of one Python dict per row
+rng = np.random.default_rng()
+n = len(patient_ids) * DAYS
+
+df = pd.DataFrame({
+    "Patient ID": np.repeat(patient_ids, DAYS),
+    "Heart Rate": rng.integers(60, 111, n),
+    "BP_Systolic": rng.integers(100, 171, n),
+    "BP_Diastolic": rng.integers(60, 121, n),
+    "Sleep Hours Per Day": np.round(rng.uniform(3, 9, n), 1),
+    "Physical Activity Per day": rng.integers(0, 2, n),
+    "Timestamp": int(time.time()) + np.tile(np.arange(DAYS), len(patient_ids))
+})
+# Write Parquet so downstream Spark reads typed columns instead of
+# reparsing CSV text
+df.to_parquet("simulated_vitals.parquet", engine="pyarrow", compression="snappy", index=False)
+print("Generated simulated_vitals.parquet")
 
 
 
@@ -1,43 +1,29 @@
 """
 Preprocessing Utilities for Health Data
 Contains functions for preprocessing health monitoring data before model training.
+The feature transformations live in common/preprocess.py, shared with the
+Lambda inference path so training and serving cannot drift apart.
 """
 
 import pandas as pd
 
+from common.preprocess import preprocess_frame
+
 
 def preprocess_health_data(df):
     """
     Preprocess health data for machine learning model training.
-    
-    Steps:
-    1. Split blood pressure column into systolic and diastolic
-    2. Drop identifier columns (Patient ID, Country, Continent, Hemisphere)
-    3. One-hot encode categorical variables
-    4. Fill missing values with 0
-    
+
+    Thin wrapper around the shared preprocess_frame; see
+    common/preprocess.py for the transformation steps.
+
     Args:
         df (pd.DataFrame): Raw health data dataframe
-        
+
     Returns:
         pd.DataFrame: Preprocessed dataframe ready for model training
     """
-    df = df.copy()
-    
-    # Split blood pressure
-    if "Blood Pressure" in df.columns:
-        bp = df["Blood Pressure"].astype(str).str.split("/", n=1, expand=True)
-        df["BP_Systolic"] = pd.to_numeric(bp[0], errors="coerce")
-        df["BP_Diastolic"] = pd.to_numeric(bp[1], errors="coerce")
-        df.drop(columns=["Blood Pressure"], inplace=True)
-    
-    # Drop identifiers
-    df = df.drop(columns=["Patient ID", "Country", "Continent", "Hemisphere"], errors="ignore")
-    
-    # One-hot encode categoricals
-    df = pd.get_dummies(df, drop_first=True).fillna(0)
-    
-    return df
+    return preprocess_frame(df)
 
 
 def prepare_train_test_split(df, test_size=0.2, random_state=42):